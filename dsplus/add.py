@@ -26,24 +26,28 @@ Modes:
 import argparse
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 import subprocess
 import re
-import datetime
+from dataclasses import dataclass, field
 from datetime import date
+
 from .dsputils import (
     resolve_catalog_paths,
     yload,
     ydump,
     cfg_load,
+    catalog_load,
+    catalog_append,
+    doc_cfg_load,
     get_doc_dir,
-    headers_from_registry,   
-    bump_registry_counter,   
 )
 
 try:
     from ruamel.yaml import YAML
+    from ruamel.yaml.representer import SafeRepresenter
 except Exception as e:
     raise SystemExit("ERROR: ruamel.yaml is required. Try: pip install ruamel.yaml") from e
 
@@ -51,39 +55,23 @@ yaml = YAML()
 yaml.preserve_quotes = True
 yaml.indent(mapping=2, sequence=2, offset=0)
 
-DEFAULT_EXPECTED_FILES = {
-    "config": "catalog_config.yml",
-    "add_script": "add.py",
-    "registry": "catalog_registry.yml",
-    "catalog": "catalog.yml",
-}
+# Item files are small, freshly generated by doorstop and rewritten in full,
+# so they are patched with the safe (de)serializer instead of round-trip.
+# Keys come out sorted and multi-line strings as `|` blocks, as doorstop
+# itself saves items (its _Literal text).
+class _ItemRepresenter(SafeRepresenter):
+    pass
 
-import argparse
-import os
-import sys
-from pathlib import Path
-from typing import Any, Dict, List, Optional
-import subprocess
-import re
-from datetime import date
+def _represent_item_str(representer, data: str):
+    style = "|" if "\n" in data else None
+    return representer.represent_scalar("tag:yaml.org,2002:str", data, style=style)
 
-from .dsputils import (
-    resolve_catalog_paths,
-    yload,
-    ydump,
-    cfg_load,
-    get_doc_dir,
-    bump_registry_counter,
-)
+# on the subclass, so the shared safe loader's representer is left alone
+_ItemRepresenter.add_representer(str, _represent_item_str)
 
-try:
-    from ruamel.yaml import YAML
-except Exception as e:
-    raise SystemExit("ERROR: ruamel.yaml is required. Try: pip install ruamel.yaml") from e
-
-yaml = YAML()
-yaml.preserve_quotes = True
-yaml.indent(mapping=2, sequence=2, offset=0)
+item_yaml = YAML(typ="safe")
+item_yaml.Representer = _ItemRepresenter
+item_yaml.default_flow_style = False
 
 DEFAULT_EXPECTED_FILES = {
     "config": "catalog_config.yml",
@@ -99,75 +87,102 @@ def _ensure_list(d: dict, key: str):
     d[key] = []
     return d[key]
 
-def _headers_for_prefix(cat_data: dict, item_prefix: str) -> List[str]:
-    """Return header titles in catalog.yml order for this document/prefix."""
-    items = cat_data.get("items") or []
-    headers = []
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        if str(it.get("type", "")).lower() != "header":
-            continue
-        iid = str(it.get("id", ""))
-        if iid.startswith(item_prefix):
-            title = it.get("title")
-            if title:
-                headers.append(str(title))
-    return headers
-
-def _header_index(headers: List[str], label: str) -> Optional[int]:
-    """1-based index of label in headers (exact match), else None."""
-    try:
-        return headers.index(label) + 1
-    except ValueError:
-        return None
-
-def _count_items_under_header(cat_data: dict, item_prefix: str, header_label: str) -> int:
-    """Count non-header items already registered under given header (by catalog 'type')."""
-    items = cat_data.get("items") or []
-    n = 0
+def _scan_catalog_for_prefix(items: list, item_prefix: str) -> Tuple[List[str], Dict[str, int], Set[str]]:
+    """
+    One pass over catalog.yml items returning, for this document/prefix:
+    header titles in catalog order, the item count per header label (by
+    catalog 'type'), and the set of all catalog ids (any prefix).
+    """
+    headers: List[str] = []
+    counts: Dict[str, int] = {}
+    ids: Set[str] = set()
+    append = headers.append
+    add_id = ids.add
+    get_count = counts.get
     for it in items:
         if not isinstance(it, dict):
             continue
-        iid = str(it.get("id", ""))
+        get = it.get
+        iid = str(get("id", ""))
+        add_id(iid)
         if not iid.startswith(item_prefix):
             continue
-        t = it.get("type")
-        if isinstance(t, str) and t == header_label:
-            n += 1
-    return n
-
-def main(argv=None):
-    ap = argparse.ArgumentParser(description="Add a Doorstop item with strict header policy.")
-    ap.add_argument("prefix", help="Document prefix (e.g., APP-QL-CNI)")
-    ap.add_argument("--title", required=True, help="Item title (for headers, this is the header label)")
-    ap.add_argument("--type", required=True, help="Either 'header' to bootstrap a header, or the EXACT header label to add under")
-    ap.add_argument("--root", default="reqs/", help="Root folder for Doorstop docs")
-    ap.add_argument("--item_defaults", required=True, help="Defaults YAML for the new item")
-    args = ap.parse_args(argv)
-
-    # Resolve paths / config
-    paths = resolve_catalog_paths(DEFAULT_EXPECTED_FILES)
-    abs_config   = paths.abs_config
-    abs_registry = paths.abs_registry
-    abs_catalog  = paths.abs_catalog
-
-    cfg = cfg_load(abs_config, yaml)
-    if cfg == {}:
-        ap.error(f"Config file is empty or invalid: {abs_config}")
-
-    root_str = (args.root or cfg.get("root", "")).strip()
-    if not root_str:
-        ap.error("`root` is empty. Provide --root or set 'root' in catalog_config.yml.")
-    root = Path(root_str).expanduser().resolve()
-
-    item_prefix = args.prefix
-    item_title  = args.title
-    item_type   = args.type  # either 'header' or the header label to file under
-
-    # Locate document dir and settings
+        t = get("type")
+        if isinstance(t, str):
+            counts[t] = get_count(t, 0) + 1
+            if t.lower() == "header":
+                title = get("title")
+                if title:
+                    append(str(title))
+    return headers, counts, ids
+
+def _level_value(h: int, k: int):
+    """
+    YAML value for level H.K, following Doorstop's own Level.save_level:
+    a float when that round-trips (1.0 for a header, 1.1, 2.3), otherwise the
+    string, so 1.10 is kept as '1.10' instead of collapsing to 1.1.
+    """
+    if k and k % 10 == 0:
+        return f"{h}.{k}"
+    return float(f"{h}.{k}")
+
+@lru_cache(maxsize=8)
+def _id_regex(digits: int) -> "re.Pattern[str]":
+    """Compiled matcher for a Doorstop item id with `digits` digits in doorstop's stdout."""
+    return re.compile(rf"([A-Z]+-[A-Z0-9-]+-\d{{{digits}}})")
+
+def _item_files(doc_dir: Path, item_prefix: str) -> Set[str]:
+    """Names of the item files (<prefix>*.yml / *.yaml) directly inside doc_dir."""
+    with os.scandir(doc_dir) as it:
+        return {
+            e.name for e in it
+            if e.name.startswith(item_prefix) and e.name.endswith((".yml", ".yaml")) and e.is_file()
+        }
+
+class _CatalogIndex:
+    """
+    Lookups over catalog.yml items for one document prefix: header order,
+    1-based header position, item count per header and all catalog ids.
+    Built once per loaded catalog and kept current by add(), so sequential
+    adds sharing a context never rescan the item list.
+    """
+
+    def __init__(self, cat_data: dict, item_prefix: str):
+        self.item_prefix = item_prefix
+        self.headers, self.counts, self.ids = _scan_catalog_for_prefix(cat_data.get("items") or [], item_prefix)
+        self.header_pos: Dict[str, int] = {}
+        for i, title in enumerate(self.headers, start=1):
+            self.header_pos.setdefault(title, i)
+
+    def add(self, entry: dict) -> None:
+        """Record a catalog entry that was just appended to the items list."""
+        iid = str(entry.get("id", ""))
+        self.ids.add(iid)
+        if not iid.startswith(self.item_prefix):
+            return
+        t = entry.get("type")
+        if str(t or "").lower() == "header" and entry.get("title"):
+            title = str(entry["title"])
+            self.headers.append(title)
+            self.header_pos.setdefault(title, len(self.headers))
+        if isinstance(t, str):
+            self.counts[t] = self.counts.get(t, 0) + 1
+
+@dataclass
+class _DocContext:
+    """Settings of the target document; fixed while items are added to it."""
+    prefix: str
+    doc_dir: Path
+    doc_cfg: Dict[str, Any]
+    digits: int
+    sep: str
+    ext: str
+    doc_title: Optional[str]
+
+def _doc_context(root: Path, item_prefix: str, abs_catalog: Path, cfg: Dict[str, Any]) -> _DocContext:
+    """Locate the document and derive its item settings (falling back to catalog_config.yml)."""
     doc_dir = get_doc_dir(root, item_prefix, abs_catalog, yaml)
-    doc_cfg = yload(doc_dir / ".doorstop.yml", yaml) or {}
+    doc_cfg = doc_cfg_load(doc_dir)
     settings = (doc_cfg.get("settings") or {})
     digits = int(settings.get("digits") or cfg.get("digits", 3))
     sep = str(settings.get("sep") or cfg.get("sep", "-") or "")
@@ -184,10 +199,87 @@ def main(argv=None):
     except Exception:
         doc_title = None
 
+    return _DocContext(item_prefix, doc_dir, doc_cfg, digits, sep, ext, doc_title)
+
+@dataclass(slots=True)
+class AddContext:
+    """
+    State shared by the adds of one batch (see main). Paths, the document and
+    the loaded catalog/registry are filled in on first use; `appended` and
+    `registry_dirty` mark what flush_context still has to write.
+    """
+    registry_path: Optional[Path] = None
+    catalog_path: Optional[Path] = None
+    resolved: Dict[str, Path] = field(default_factory=dict)
+    doc: Optional[_DocContext] = None
+    cat_data: Optional[Dict[str, Any]] = None
+    cat_index: Optional[_CatalogIndex] = None
+    appended: List[Dict[str, Any]] = field(default_factory=list)
+    reg_data: Optional[Dict[str, Any]] = None
+    reg_loaded_last: int = 0
+    registry_dirty: bool = False
+    today_iso: str = field(default_factory=lambda: date.today().isoformat())
+
+def _resolved(ctx: AddContext, raw: str) -> Path:
+    """Path(raw).expanduser().resolve(), once per distinct input per context."""
+    p = ctx.resolved.get(raw)
+    if p is None:
+        p = ctx.resolved[raw] = Path(raw).expanduser().resolve()
+    return p
+
+def _last_number(reg_data: Any) -> int:
+    try:
+        return int((reg_data or {}).get("last_number", 0))
+    except Exception:
+        return 0
+
+def _registry_last_number(ctx: AddContext) -> int:
+    """
+    Registry `last_number`, loaded (round-trip) once per context; later adds
+    and the final flush reuse the same in-memory registry document.
+    """
+    if ctx.reg_data is None:
+        ctx.reg_data = yload(ctx.registry_path, yaml, readonly=False) or {}
+        ctx.reg_loaded_last = _last_number(ctx.reg_data)
+    return _last_number(ctx.reg_data)
+
+def flush_context(ctx: AddContext) -> None:
+    """
+    Write the catalog/registry changes that main(..., flush=False) kept in memory.
+    Raises RuntimeError, writing nothing, if the registry's `last_number` moved
+    since this context loaded it (another add ran in between).
+    """
+    if ctx.registry_dirty:
+        on_disk = _last_number(yload(ctx.registry_path))
+        if on_disk != ctx.reg_loaded_last:
+            raise RuntimeError(
+                f"{ctx.registry_path}: last_number changed from {ctx.reg_loaded_last} to {on_disk} "
+                f"while this add ran; not overwriting it. Check the new items' catalog ids."
+            )
+        ydump(ctx.registry_path, ctx.reg_data, yaml, durable=True)
+        ctx.registry_dirty = False
+        print(f"[registry] last_number -> {ctx.reg_data['last_number']}")
+    if ctx.appended:
+        # add only ever appends entries, so splice those in instead of a full dump
+        catalog_append(ctx.catalog_path, ctx.cat_data, ctx.appended, yaml, durable=True)
+        ctx.appended = []
+
+def _add_one(ctx: AddContext, doc: _DocContext, cfg: Dict[str, Any], root: Path,
+             item_title: str, item_type: str, item_defaults: Path) -> None:
+    """Create one item in `doc` via doorstop, patch its attributes and register it in the catalog."""
+    item_prefix = doc.prefix
+    doc_dir = doc.doc_dir
+    digits, sep, ext = doc.digits, doc.sep, doc.ext
+
     # Load catalog; build header index
-    cat_data = yload(abs_catalog, yaml) or {}
+    if ctx.cat_data is None:
+        ctx.cat_data = catalog_load(ctx.catalog_path, yaml) or {}
+    cat_data = ctx.cat_data
     items_list = _ensure_list(cat_data, "items")
-    headers = _headers_for_prefix(cat_data, item_prefix)
+    if ctx.cat_index is None or ctx.cat_index.item_prefix != item_prefix:
+        ctx.cat_index = _CatalogIndex(cat_data, item_prefix)
+    cat_index = ctx.cat_index
+    headers = cat_index.headers
 
     is_header = (str(item_type).strip().lower() == "header")
     header_label_for_item = None
@@ -203,20 +295,21 @@ def main(argv=None):
         if not headers:
             print(f"ERROR: No headers exist yet for {item_prefix}. Seed headers first (e.g., `dsplus.add {item_prefix} --type header --title \"{header_label_for_item}\"`).", file=sys.stderr)
             sys.exit(2)
-        H = _header_index(headers, header_label_for_item)
+        H = cat_index.header_pos.get(header_label_for_item)
         if H is None:
             print(f"ERROR: Header '{header_label_for_item}' not found for {item_prefix}. Run create/seed or add the header first.", file=sys.stderr)
             sys.exit(2)
 
     # For requirements, compute next K under that header from catalog
     if not is_header:
-        K_existing = _count_items_under_header(cat_data, item_prefix, header_label_for_item)
+        K_existing = cat_index.counts.get(header_label_for_item, 0)
         K = K_existing + 1
     else:
         K = 0  # unused for headers
 
     # Create the item via Doorstop
-    cmd = ["doorstop", "add", item_prefix, "-d", args.item_defaults]
+    cmd = ["doorstop", "add", item_prefix, "-d", str(item_defaults)]
+    files_before = _item_files(doc_dir, item_prefix)
     try:
         result = subprocess.run(cmd, check=True, cwd=root, capture_output=True, text=True)
     except subprocess.CalledProcessError as e:
@@ -228,19 +321,24 @@ def main(argv=None):
         sys.exit(e.returncode)
 
     # Determine the new file path / doorstop id
-    # The new number is one more than last_number *before* we bump the counter persistently.
-    reg_before = yload(abs_registry, yaml) or {}
-    last_number_before = int(reg_before.get("last_number", 0))
-    next_number = last_number_before + 1
-    doorstop_id = f"{item_prefix}{sep}{next_number:0{digits}d}"
-
-    candidate = doc_dir / f"{doorstop_id}{ext}"
+    # The new number is one more than last_number *before* we bump the counter.
+    next_number = _registry_last_number(ctx) + 1
+
+    # The new item is the one file doorstop added to doc_dir; only if that is
+    # ambiguous fall back to guessing the id from the counter / doorstop stdout.
+    new_files = _item_files(doc_dir, item_prefix) - files_before
+    if len(new_files) == 1:
+        candidate = doc_dir / new_files.pop()
+        doorstop_id = candidate.stem
+    else:
+        doorstop_id = f"{item_prefix}{sep}{next_number:0{digits}d}"
+        candidate = doc_dir / f"{doorstop_id}{ext}"
     if not candidate.exists():
         alt = doc_dir / f"{doorstop_id}{('.yml' if ext == '.yaml' else '.yaml')}"
         if alt.exists():
             candidate = alt
         else:
-            m = re.search(r"([A-Z]+-[A-Z0-9-]+-\d{"+str(digits)+r"})", (result.stdout or ""))
+            m = _id_regex(digits).search(result.stdout or "")
             if m:
                 doorstop_id = m.group(1)
                 c1 = doc_dir / f"{doorstop_id}.yaml"
@@ -255,20 +353,22 @@ def main(argv=None):
 
     print("[new item]", candidate.name)
 
-    # Persist bump AFTER successful add -> yields the catalog_id counter
-    new_last = bump_registry_counter(abs_registry, yaml)
-    print(f"[registry] last_number -> {new_last}")
+    # Bump AFTER successful add -> yields the catalog_id counter; the registry
+    # file is written (once, with the same document we loaded) by flush_context
+    new_last = next_number
+    ctx.reg_data["last_number"] = new_last
+    ctx.registry_dirty = True
 
     # Catalog uid (global RQ-xxxxx)
     catalog_prefix = str(cfg.get("catalog_prefix", "RQ"))
     width = int(cfg.get("width", 5))
     catalog_uid = f"{catalog_prefix}-{new_last:0{width}d}"
 
-    # Load the new item and patch attributes
-    item_data = yload(candidate, yaml) or {}
+    # Load the new item (safe, read-only parse) and patch attributes in memory
+    item_data = yload(candidate) or {}
 
     # Basic identity
-    today_iso = date.today().isoformat()
+    today_iso = ctx.today_iso
     item_data["uid"] = doorstop_id              # <-- item's own unique id (e.g., APP-QL-CNI-004)
     item_data["catalog_id"] = catalog_uid       # <-- global catalog uid (e.g., RQ-00004)
 
@@ -283,7 +383,7 @@ def main(argv=None):
     if not item_data.get("form_id"):
         item_data["form_id"] = base_form_id
     if not item_data.get("form_name"):
-        item_data["form_name"] = doc_title or base_form_id
+        item_data["form_name"] = doc.doc_title or base_form_id
 
     # Header attribute
     if is_header:
@@ -306,11 +406,7 @@ def main(argv=None):
     item_data.setdefault("active", True)
 
     # Level
-    level_str = f"{H}.0" if is_header else f"{H}.{K}"
-    try:
-        item_data["level"] = float(level_str)
-    except Exception:
-        item_data["level"] = level_str  # fallback as string if needed
+    item_data["level"] = _level_value(H, 0 if is_header else K)
 
     # Links (preserve if seeded elsewhere, else [])
     item_data.setdefault("links", [])
@@ -319,7 +415,7 @@ def main(argv=None):
     if not isinstance(item_data.get("tags"), list):
         item_data["tags"] = []
 
-    ydump(candidate, item_data, yaml)
+    ydump(candidate, item_data, item_yaml)
     print(f"[item] patched attributes for {doorstop_id} (uid={doorstop_id}, catalog_id={catalog_uid}, level={item_data['level']})")
 
     # Update catalog.yml
@@ -330,13 +426,69 @@ def main(argv=None):
         "type": ("header" if is_header else header_label_for_item),
         "reqs": [],
     }
-    exists = any(isinstance(it, dict) and it.get("id") == doorstop_id for it in items_list)
-    if not exists:
+    if doorstop_id not in cat_index.ids:
         items_list.append(cat_entry)
-        ydump(abs_catalog, cat_data, yaml)
+        cat_index.add(cat_entry)
+        ctx.appended.append(cat_entry)
         print(f"[catalog] appended item id={doorstop_id}, uid={catalog_uid}, type={cat_entry['type']}")
     else:
         print(f"[catalog] item id={doorstop_id} already present; skipping")
 
+def main(argv=None, context: Optional[AddContext] = None, flush: bool = True):
+    """
+    CLI entry point. In-process callers adding several items to the same
+    document (create.py header seeding) can pass one AddContext to all
+    calls: the document settings (`doc`), the loaded catalog (`cat_data`)
+    and registry (`reg_data`) are stored in it on first use and reused by
+    later calls.
+
+    With flush=False the catalog append and the registry bump stay in the
+    context; call flush_context(context) (or a final main(..., flush=True))
+    to write both files once for the whole batch.
+    """
+    ctx = context if context is not None else AddContext()
+    ap = argparse.ArgumentParser(description="Add a Doorstop item with strict header policy.")
+    ap.add_argument("prefix", help="Document prefix (e.g., APP-QL-CNI)")
+    ap.add_argument("--title", required=True, help="Item title (for headers, this is the header label)")
+    ap.add_argument("--type", required=True, help="Either 'header' to bootstrap a header, or the EXACT header label to add under")
+    ap.add_argument("--root", default="reqs/", help="Root folder for Doorstop docs")
+    ap.add_argument("--item_defaults", required=True, help="Defaults YAML for the new item (relative to the current directory)")
+    args = ap.parse_args(argv)
+
+    # Resolve paths / config
+    paths = resolve_catalog_paths(DEFAULT_EXPECTED_FILES)
+    abs_config   = paths.abs_config
+    abs_registry = paths.abs_registry
+    abs_catalog  = paths.abs_catalog
+    if ctx.registry_path is None:
+        ctx.registry_path = abs_registry
+    if ctx.catalog_path is None:
+        ctx.catalog_path = abs_catalog
+
+    cfg = cfg_load(abs_config)
+    if cfg == {}:
+        ap.error(f"Config file is empty or invalid: {abs_config}")
+
+    root_str = (args.root or cfg.get("root", "")).strip()
+    if not root_str:
+        ap.error("`root` is empty. Provide --root or set 'root' in catalog_config.yml.")
+    # resolve CLI paths once here; the helpers below take them as given
+    root = _resolved(ctx, root_str)
+    item_defaults = _resolved(ctx, args.item_defaults)
+
+    item_prefix = args.prefix
+    item_title  = args.title
+    item_type   = args.type  # either 'header' or the header label to file under
+
+    # Locate document dir and settings (once per document per context)
+    if ctx.doc is None or ctx.doc.prefix != item_prefix:
+        ctx.doc = _doc_context(root, item_prefix, abs_catalog, cfg)
+    doc = ctx.doc
+
+    _add_one(ctx, doc, cfg, root, item_title, item_type, item_defaults)
+
+    if flush:
+        flush_context(ctx)
+
 if __name__ == "__main__":
     main()
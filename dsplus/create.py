@@ -6,12 +6,11 @@ doorstop_create_plus.py — wrapper around `doorstop create` and header seeding.
 - Patches the new .doorstop.yml with: digits, itemformat, sep, parent, prefix
   and document defaults (title, by, major, minor, copyright) if provided.
 - Seeds headers from `catalog_registry.yml` group (e.g., `form: ["Form Fields","UI Behavior"]`)
-  by calling custom/doorstop_add_plus.py with --header, --text, --level 0.
+  by calling dsplus.add in-process with --type header.
 
 Requires:
   - ruamel.yaml
   - Doorstop CLI
-  - plus.py available (default: dsplus/plus.py)
 """
 
 import argparse
@@ -28,6 +27,7 @@ from .dsputils import (
     find_doc_dir_by_prefix,
     headers_from_registry
 )
+from .add import main as add_main, flush_context, AddContext
 
 try:
     from ruamel.yaml import YAML
@@ -49,7 +49,7 @@ DEFAULT_EXPECTED_FILES = {
 def patch_doordoc_yaml(doc_dir: Path, parent: str, prefix: str, digits: int, itemformat: str, sep: str,
                        title: Optional[str], by: Optional[str], major: Optional[str], minor: Optional[str], copyright_text: Optional[str]):
     cfg_path = doc_dir / ".doorstop.yml"
-    doc = yload(cfg_path, yaml) or {}
+    doc = yload(cfg_path, yaml, readonly=False) or {}
     doc.setdefault("settings", {})
     doc["settings"]["digits"] = digits
     doc["settings"]["itemformat"] = itemformat
@@ -98,7 +98,7 @@ def main(argv=None):
     abs_add_script = paths.abs_add_script
 
     # load config
-    cfg = cfg_load(abs_config, yaml)
+    cfg = cfg_load(abs_config)
 
     # 1) config must not be empty
     if cfg == {}:
@@ -118,7 +118,7 @@ def main(argv=None):
 
     parent = "-".join(docs[:-1])
 
-    parent_dir = find_doc_dir_by_prefix(root_str, parent, yaml)
+    parent_dir = find_doc_dir_by_prefix(str(root), parent)
 
     doc_dir = (parent_dir / args.name) if isinstance(parent_dir, Path) else Path(parent_dir) / args.name
     doc_dir.mkdir(parents=True, exist_ok=True)
@@ -163,33 +163,31 @@ def main(argv=None):
         copyright_text="copyright: '© 2025 AIF - *All rights reserved*'",
     )
 
-    headers = headers_from_registry(Path(abs_registry), args.type, yaml)
+    headers = headers_from_registry(Path(abs_registry), args.type)
 
     # resolve absolute header-defaults path once
     abs_header_defaults = Path(args.header_defaults).expanduser().resolve()
 
     seeded = 0
-    # seed headers at level 0
-    for label in headers:
-        add_cmd = [
-            sys.executable, "-m", "dsplus.add",
-            doc_prefix,
-            "--title", str(label),
-            "--type", "header",
-            "--root", str(root),
-            "--item_defaults", str(abs_header_defaults)
-        ]
-        print("[seed]", " ".join(add_cmd))
-        try:
-            subprocess.run(add_cmd, check=True, cwd=str(Path(os.getcwd())))
+    # seed headers in-process; one shared context so the doc dir and catalog
+    # are resolved/loaded once for all headers (add exits on failure).
+    # catalog.yml / catalog_registry.yml are written once, after the loop --
+    # also when a later header fails, so already-created items stay registered.
+    add_ctx = AddContext()
+    try:
+        for label in headers:
+            add_argv = [
+                doc_prefix,
+                "--title", str(label),
+                "--type", "header",
+                "--root", str(root),
+                "--item_defaults", str(abs_header_defaults)
+            ]
+            print("[seed] dsplus.add", " ".join(add_argv))
+            add_main(add_argv, context=add_ctx, flush=False)
             seeded += 1
-        except subprocess.CalledProcessError as e:
-            print(f"[doorstop create] failed (exit {e.returncode})", file=sys.stderr)
-            if e.stdout:
-                print(e.stdout, file=sys.stderr)
-            if e.stderr:
-                print(e.stderr, file=sys.stderr)
-            sys.exit(e.returncode)
+    finally:
+        flush_context(add_ctx)
 
     print(f"OK: created {doc_prefix} at {doc_dir} and seeded {seeded} header(s).")
 
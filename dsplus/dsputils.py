@@ -1,10 +1,14 @@
 # dsplus/dsputils.py
 from __future__ import annotations
+import io
+import logging
 import os
 import sys
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Mapping, Union, Optional, Dict, Any
+from typing import Mapping, Union, Optional, Dict, Any, List, Tuple, Iterator
 
 try:
     from ruamel.yaml import YAML
@@ -12,6 +16,11 @@ except Exception:
     print("ERROR: ruamel.yaml is required. pip install ruamel.yaml", file=sys.stderr)
     raise
 
+log = logging.getLogger(__name__)
+
+# Read-only loader (LibYAML-backed when ruamel.yaml.clib is available); used
+# where nothing is dumped back, so quote/comment preservation is not needed.
+_SAFE_YAML = YAML(typ="safe")
 
 # ---------- Paths ----------
 def package_root() -> Path:
@@ -24,15 +33,21 @@ def resolve_catalog_paths(expected_files: Mapping[str, str]) -> SimpleNamespace:
     Resolve required files inside the dsplus package directory.
     Returns a SimpleNamespace with attributes named "abs_<key>".
     Raises FileNotFoundError if any expected file is missing.
+    Successful resolutions are memoized per `expected_files` content.
     """
+    return _resolve_catalog_paths(tuple(expected_files.items()))
+
+
+@lru_cache(maxsize=4)
+def _resolve_catalog_paths(expected_files: Tuple[Tuple[str, str], ...]) -> SimpleNamespace:
     base = package_root()
     if not base.is_dir():
         raise FileNotFoundError(f"Directory not found: {base}")
 
-    paths = {k: (base / v).resolve() for k, v in expected_files.items()}
+    paths = {k: (base / v).resolve() for k, v in expected_files}
     missing = [p.name for p in paths.values() if not p.exists()]
     if missing:
-        expected_list = "\n".join(f"- {name}" for name in expected_files.values())
+        expected_list = "\n".join(f"- {name}" for _, name in expected_files)
         raise FileNotFoundError(
             f"Missing required files in {base}: {', '.join(missing)}\n"
             f"Expected names:\n{expected_list}"
@@ -42,77 +57,310 @@ def resolve_catalog_paths(expected_files: Mapping[str, str]) -> SimpleNamespace:
 
 
 # ---------- YAML helpers ----------
-def _yaml_or(yaml: Optional[YAML]) -> YAML:
-    if yaml is not None:
-        return yaml
+def _round_trip_yaml() -> YAML:
     y = YAML()
     y.preserve_quotes = True
     y.indent(mapping=2, sequence=2, offset=0)
     return y
 
 
-def yload(path: Path, yaml: Optional[YAML] = None):
-    """Load YAML file (returns dict/obj or None if not exists)."""
+# Shared default instance; building a YAML() per call is the costly part.
+_RT_YAML = _round_trip_yaml()
+
+
+def _yaml_or(yaml: Optional[YAML]) -> YAML:
+    return yaml if yaml is not None else _RT_YAML
+
+
+def yload(path: Path, yaml: Optional[YAML] = None, readonly: bool = True):
+    """
+    Load YAML file (returns dict/obj or None if not exists) with `yaml` if
+    given. Without one, read-only loads use the shared safe loader; pass
+    readonly=False when the result is mutated and written back with ydump,
+    so round-trip formatting and quotes survive.
+    """
     if not path.exists():
         return None
-    y = _yaml_or(yaml)
+    if yaml is not None:
+        y = yaml
+    else:
+        y = _SAFE_YAML if readonly else _RT_YAML
     with path.open("r", encoding="utf-8") as f:
         return y.load(f)
 
 
-def ydump(path: Path, data, yaml: Optional[YAML] = None):
-    """Dump YAML file, creating parent dirs if needed."""
+# Write buffer for ydump: large enough that catalog.yml-sized dumps reach the
+# OS as one write() on close instead of many small serializer writes.
+_DUMP_BUFFER_SIZE = 1 << 16
+
+
+@contextmanager
+def _atomic_write(path: Path, *, durable: bool = False) -> Iterator[Any]:
+    """
+    Text file open on a sibling `<name>.tmp` that replaces `path` atomically
+    when the block exits cleanly (and is removed otherwise), so readers never
+    see a half-written file. durable=True also fsyncs before the rename.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with tmp.open("w", encoding="utf-8", buffering=_DUMP_BUFFER_SIZE) as f:
+            yield f
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def ydump(path: Path, data, yaml: Optional[YAML] = None, *, durable: bool = False):
+    """
+    Dump YAML file, creating parent dirs if needed. The file is replaced
+    atomically; durable=True also fsyncs it. Use that for the final write of
+    a batch, not intermediate ones.
+    """
     y = _yaml_or(yaml)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
+    with _atomic_write(path, durable=durable) as f:
         y.dump(data, f)
 
 
-def cfg_load(config_path: Union[str, Path], yaml: Optional[YAML] = None) -> Dict[str, Any]:
+def _stat_key(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+# config_path -> ((st_mtime_ns, st_size), merged config)
+_CFG_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def cfg_load(config_path: Union[str, Path]) -> Dict[str, Any]:
     """
     Load catalog_config.yml (merge over defaults). `config_path` must point to the file.
+    The config is only read (safe loader). The merged result is cached until
+    the file's mtime/size change; callers get a copy.
     """
-    cfg = {}
     config_path = Path(config_path)
-    data = yload(config_path, yaml) or {}
+    key = _stat_key(config_path) if config_path.exists() else None
+    hit = _CFG_CACHE.get(config_path)
+    if key is not None and hit is not None and hit[0] == key:
+        return dict(hit[1])
+
+    cfg = {}
+    data = yload(config_path) or {}
     if isinstance(data, dict):
         for k, v in data.items():
             if v is not None:
                 cfg[k] = v
     if "catalog_file" not in cfg:
         cfg["catalog_file"] = "catalog.yaml"
-    return cfg
+    if key is not None:
+        _CFG_CACHE[config_path] = (key, cfg)
+    return dict(cfg)
 
-def find_doc_dir_by_prefix(root_str: str, parent_prefix: str, yaml: Optional[YAML] = None) -> Path:
-    root = Path(root_str).expanduser().resolve()
-    if not root.is_dir():
-        raise FileNotFoundError(f"Root directory not found: {root}")
+# ---------- Catalog ----------
+# catalog_path -> (st_mtime_ns, st_size) as of this process's last catalog
+# load or write; catalog_append only splices into a file still in that state.
+_CATALOG_STAMPS: Dict[Path, Tuple[int, int]] = {}
+
+
+def catalog_load(catalog_path: Path, yaml: Optional[YAML] = None):
+    """
+    Round-trip load of catalog.yml for a read-modify-write cycle (None if it
+    does not exist). Write back with catalog_dump / catalog_append.
+    """
+    if not catalog_path.exists():
+        return None
+    # stat before reading: if the file changes mid-read the stamp is stale
+    # and a later catalog_append falls back to a full dump
+    stamp = _stat_key(catalog_path)
+    data = yload(catalog_path, yaml, readonly=False)
+    _CATALOG_STAMPS[catalog_path] = stamp
+    return data
+
+
+def catalog_dump(catalog_path: Path, data, yaml: Optional[YAML] = None, *, durable: bool = False) -> None:
+    """ydump the catalog and record its new stamp."""
+    ydump(catalog_path, data, yaml, durable=durable)
+    _CATALOG_STAMPS[catalog_path] = _stat_key(catalog_path)
+
+
+def _items_block_end(text: str, n_items: int) -> Optional[int]:
+    """Offset past the `items:` block if it is in catalog_dump's layout with `n_items` entries, else None."""
+    if text.startswith("items:\n"):
+        pos = len("items:\n")
+    else:
+        start = text.find("\nitems:\n")
+        if start < 0:
+            return None
+        pos = start + len("\nitems:\n")
+    count = 0
+    while True:
+        if pos >= len(text):
+            return None  # nothing follows the block to splice in front of
+        c = text[pos]
+        if c in "\n#":
+            return None  # blank/comment line: ruamel would attach it to an entry
+        if c not in "- ":
+            break
+        nl = text.find("\n", pos)
+        if nl < 0:
+            return None
+        line = text[pos:nl]
+        if not line.strip() or line.lstrip().startswith("#"):
+            return None
+        if line.startswith("- "):
+            count += 1
+        elif count == 0:
+            return None  # indented sequence / continuation before any entry
+        pos = nl + 1
+    return pos if count == n_items else None
+
+
+def catalog_append(catalog_path: Path, data, entries: List[Dict[str, Any]], yaml: Optional[YAML] = None,
+                   *, durable: bool = False) -> None:
+    """
+    Write back a catalog whose only change since it was loaded is `entries`
+    appended to data["items"]. Only the new entries are serialized; they are
+    spliced in after the last `items:` entry and the rest of catalog.yml is
+    kept as is. Falls back to catalog_dump if the file changed since this
+    process last loaded or wrote it, or its items block is not in
+    catalog_dump's layout.
+    """
+    y = _yaml_or(yaml)
+    items = data.get("items") if isinstance(data, dict) else None
+    end = text = None
+    try:
+        if entries and isinstance(items, list) and _CATALOG_STAMPS.get(catalog_path) == _stat_key(catalog_path):
+            text = catalog_path.read_text(encoding="utf-8")
+            end = _items_block_end(text, len(items) - len(entries))
+    except OSError:
+        pass
+    if end is None:
+        catalog_dump(catalog_path, data, yaml, durable=durable)
+        return
+
+    buf = io.StringIO()
+    y.dump(list(entries), buf)
+    with _atomic_write(catalog_path, durable=durable) as f:
+        f.write(text[:end])
+        f.write(buf.getvalue())
+        f.write(text[end:])
+    _CATALOG_STAMPS[catalog_path] = _stat_key(catalog_path)
+
+# ---------- .doorstop.yml cache ----------
+# cfg_path -> ((st_mtime_ns, st_size), parsed doc); read-only parses only
+_DOORSTOP_YML_CACHE: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+# (root, prefix) -> document dir resolved by a previous scan in this process
+_PREFIX_DIR_CACHE: Dict[Tuple[Path, str], Path] = {}
+
+
+def _doorstop_yml_cached(cfg_path: Path) -> Optional[Dict[str, Any]]:
+    """Cached parse of `cfg_path` if the file is unchanged since it was parsed."""
+    hit = _DOORSTOP_YML_CACHE.get(cfg_path)
+    if hit is not None and hit[0] == _stat_key(cfg_path):
+        return hit[1]
+    return None
+
+
+def doc_cfg_load(doc_dir: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read-only load of `<doc_dir>/.doorstop.yml` ({} if missing). Parses are
+    cached per file and reused while its mtime/size are unchanged, so do not
+    mutate the result; use yload(..., readonly=False) to patch the file.
+    """
+    cfg_path = Path(doc_dir) / ".doorstop.yml"
+    if not cfg_path.exists():
+        return {}
+    doc = _doorstop_yml_cached(cfg_path)
+    if doc is None:
+        key = _stat_key(cfg_path)
+        doc = yload(cfg_path) or {}
+        _DOORSTOP_YML_CACHE[cfg_path] = (key, doc)
+    return doc
+
+
+def _declares_prefix(cfg_path: Path, prefix: str) -> bool:
+    """True if the .doorstop.yml at `cfg_path` has settings.prefix == prefix."""
+    if _doorstop_yml_cached(cfg_path) is None:
+        # cheap pre-filter: a matching document must contain the prefix verbatim,
+        # so most files in the tree are rejected without a YAML parse
+        if prefix not in cfg_path.read_text(encoding="utf-8"):
+            return False
+    doc = doc_cfg_load(cfg_path.parent)
+    return (doc.get("settings") or {}).get("prefix") == prefix
+
+
+_SKIP_DIRS = {"__pycache__", "node_modules", "venv"}
+
+
+def _iter_doorstop_dirs(root: Path) -> Iterator[Path]:
+    """
+    Yield every directory under `root` (inclusive) that holds a .doorstop.yml.
+    Uses os.scandir with an explicit stack; hidden dirs (.git, .tox, ...) and
+    _SKIP_DIRS are not descended into, and symlinked dirs are not followed.
+    """
+    stack = [str(root)]
+    while stack:
+        dirpath = stack.pop()
+        has_cfg = False
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    name = entry.name
+                    if name == ".doorstop.yml":
+                        has_cfg = True
+                    elif entry.is_dir(follow_symlinks=False):
+                        if not name.startswith(".") and name not in _SKIP_DIRS:
+                            stack.append(entry.path)
+        except OSError:
+            continue
+        if has_cfg:
+            yield Path(dirpath)
+
+
+def _scan_for_prefix(root: Path, prefix: str) -> Path:
+    """Walk `root` for the single document whose .doorstop.yml declares `prefix`."""
+    cached = _PREFIX_DIR_CACHE.get((root, prefix))
+    if cached is not None and (cached / ".doorstop.yml").exists() \
+            and _declares_prefix(cached / ".doorstop.yml", prefix):
+        return cached
 
     found = None
-    for dirpath, _, filenames in os.walk(root):
-        if ".doorstop.yml" in filenames:
-            cfg_path = Path(dirpath) / ".doorstop.yml"
-            doc = yload(cfg_path, yaml) or {}
-            if (doc.get("settings") or {}).get("prefix") == parent_prefix:
-                if found is not None:
-                    raise RuntimeError(
-                        f"Multiple documents share prefix '{parent_prefix}': {found} and {dirpath}"
-                    )
-                found = Path(dirpath)
+    for dirpath in _iter_doorstop_dirs(root):
+        if _declares_prefix(dirpath / ".doorstop.yml", prefix):
+            if found is not None:
+                raise RuntimeError(
+                    f"Multiple documents share prefix '{prefix}': {found} and {dirpath}"
+                )
+            found = dirpath
 
     if found is None:
-        raise FileNotFoundError(f"No document with prefix '{parent_prefix}' found under {root}")
+        raise FileNotFoundError(f"No document with prefix '{prefix}' found under {root}")
 
+    _PREFIX_DIR_CACHE[(root, prefix)] = found
     return found
 
+def find_doc_dir_by_prefix(root_str: str, parent_prefix: str) -> Path:
+    """
+    Directory of the document declaring `parent_prefix` under `root_str`.
+    `root_str` is used as given: the CLIs expanduser()/resolve() it once.
+    """
+    root = Path(root_str)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Root directory not found: {root}")
+
+    return _scan_for_prefix(root, parent_prefix)
+
 # ---------- Headers from registry ----------
-def headers_from_registry(reg_path: Path, group_key: str, yaml: Optional[YAML] = None) -> List[str]:
-    data = yload(reg_path, yaml) or {}
-    headers = data.get('headers')
+def headers_from_registry(reg_path: Path, group_key: str) -> List[str]:
+    data = yload(reg_path) or {}
+    headers = data.get('headers') or {}
     key = str(group_key).lower()
-    print(data)
-    print(key)
-    vals = headers.get(key)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("headers_from_registry %s: key=%r groups=%r", reg_path, key, list(headers))
+    vals = headers.get(key) if isinstance(headers, dict) else None
     return list(vals) if isinstance(vals, list) else []
 
 def bump_registry_counter(reg_path: Union[str, Path], yaml: Optional[YAML] = None) -> int:
@@ -121,13 +369,13 @@ def bump_registry_counter(reg_path: Union[str, Path], yaml: Optional[YAML] = Non
     Returns the new last_number.
     """
     p = Path(reg_path)
-    data = yload(p, yaml) or {}
+    data = yload(p, yaml, readonly=False) or {}
     try:
         last = int(data.get("last_number", 0))
     except Exception:
         last = 0
     data["last_number"] = last + 1
-    ydump(p, data, yaml)
+    ydump(p, data, yaml, durable=True)
     return data["last_number"]
 
 def _safe_list(v):
@@ -141,12 +389,19 @@ def get_doc_dir(
     yaml: Optional[YAML] = None,
     update_catalog: bool = True,
 ) -> Path:
-    rootp = Path(root).expanduser().resolve()
+    """
+    Directory of the document `doc_prefix`: the catalog's `locations` entry
+    when its `.doorstop.yml` declares that prefix, else a scan of `root` (and
+    the entry is updated). The check goes through the doc_cfg_load cache, so
+    the caller's own doc_cfg_load of the result is free.
+    `root` and `catalog_path` are used as given (resolved once by the CLIs).
+    """
+    rootp = Path(root)
     if not rootp.is_dir():
         raise FileNotFoundError(f"Root directory not found: {rootp}")
 
-    catalog_path = Path(catalog_path).expanduser().resolve()
-    catalog = yload(catalog_path, yaml) or {}
+    catalog_path = Path(catalog_path)
+    catalog = catalog_load(catalog_path, yaml) or {}
     locations = _safe_list(catalog.get("locations"))   # <-- coerce to list
 
     # Step 1: try catalog.yml -> locations
@@ -160,37 +415,20 @@ def get_doc_dir(
                 p = Path(loc_str)
                 if not p.is_absolute():
                     p = rootp / p
-                p = p.expanduser().resolve()
-                cfg_path = p / ".doorstop.yml"
-                if cfg_path.exists():
-                    data = yload(cfg_path, yaml) or {}
-                    if (data.get("settings") or {}).get("prefix") == doc_prefix:
-                        doc_dir = p
+                if (doc_cfg_load(p).get("settings") or {}).get("prefix") == doc_prefix:
+                    doc_dir = p
             break
 
     # Step 2: fallback scan
     if doc_dir is None:
-        found: Optional[Path] = None
-        for dirpath, _, filenames in os.walk(rootp):
-            if ".doorstop.yml" in filenames:
-                cfg_path = Path(dirpath) / ".doorstop.yml"
-                data = yload(cfg_path, yaml) or {}
-                if (data.get("settings") or {}).get("prefix") == doc_prefix:
-                    if found is not None:
-                        raise RuntimeError(
-                            f"Multiple documents share prefix '{doc_prefix}': {found} and {dirpath}"
-                        )
-                    found = Path(dirpath)
-        if found is None:
-            raise FileNotFoundError(f"No document with prefix '{doc_prefix}' found under {rootp}")
-        doc_dir = found
+        doc_dir = _scan_for_prefix(rootp, doc_prefix)
 
     # Step 3: update catalog.yml -> locations
     if update_catalog and doc_dir is not None:
         try:
-            loc_str = str(doc_dir.resolve().relative_to(rootp))
+            loc_str = str(doc_dir.relative_to(rootp))
         except ValueError:
-            loc_str = str(doc_dir.resolve())
+            loc_str = str(doc_dir)
 
         updated = False
         if cat_entry is None:
@@ -204,8 +442,8 @@ def get_doc_dir(
         # ensure we write back a list (even if original was null)
         catalog["locations"] = locations
         if updated:
-            ydump(catalog_path, catalog, yaml)
+            catalog_dump(catalog_path, catalog, yaml)
 
     return doc_dir
 
-__all__ = ["package_root", "resolve_catalog_paths", "yload", "ydump", "cfg_load", "find_doc_dir_by_prefix", "headers_from_registry", "bump_registry_counter", "get_doc_dir"]
+__all__ = ["package_root", "resolve_catalog_paths", "yload", "ydump", "cfg_load", "catalog_load", "catalog_dump", "catalog_append", "doc_cfg_load", "find_doc_dir_by_prefix", "headers_from_registry", "bump_registry_counter", "get_doc_dir"]
@@ -0,0 +1,76 @@
+# tests/test_dsputils.py
+# Run with: python -m unittest discover -s tests
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from dsplus import dsputils
+from dsplus.dsputils import _items_block_end, catalog_append, catalog_dump, catalog_load
+
+CATALOG = Path(__file__).resolve().parent.parent / "dsplus" / "catalog.yml"
+
+
+class ItemsBlockEndTest(unittest.TestCase):
+    def test_plain_block(self):
+        text = "items:\n- id: A\n  reqs: []\nlocations: []\n"
+        self.assertEqual(_items_block_end(text, 1), text.index("locations:"))
+
+    def test_block_after_other_key(self):
+        text = "locations: []\nitems:\n- id: A\nversion: 1\n"
+        self.assertEqual(_items_block_end(text, 1), text.index("version:"))
+
+    def test_layouts_that_fall_back(self):
+        cases = {
+            "count mismatch": ("items:\n- id: A\nlocations: []\n", 2),
+            "indented sequence": ("items:\n  - id: A\nlocations: []\n", 1),
+            "comment line": ("items:\n# note\n- id: A\nlocations: []\n", 1),
+            "blank line": ("items:\n- id: A\n\nlocations: []\n", 1),
+            "items: last in file": ("items:\n- id: A\n  reqs: []\n", 1),
+            "no trailing newline": ("locations: []\nitems:\n- id: A", 1),
+            "flow style": ("items: []\nlocations: []\n", 0),
+            "no items key": ("locations: []\n", 0),
+        }
+        for name, (text, n_items) in cases.items():
+            with self.subTest(name):
+                self.assertIsNone(_items_block_end(text, n_items))
+
+
+class CatalogAppendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = self.tmp / "catalog.yml"
+        shutil.copyfile(CATALOG, self.path)
+
+    def _append(self, data, entries):
+        data["items"].extend(entries)
+        catalog_append(self.path, data, entries)
+
+    def test_splice_matches_full_dump(self):
+        data = catalog_load(self.path)
+        entries = [
+            {"id": "APP-QL-CNI-099", "uid": "RQ-09999", "title": "Spliced", "type": "Form Fields", "reqs": []},
+            {"id": "APP-QL-CNI-100", "uid": "RQ-10000", "title": "yes: no", "type": "Form Fields", "reqs": []},
+        ]
+        # the splice path must be taken, not the catalog_dump fallback
+        with mock.patch.object(dsputils, "catalog_dump", side_effect=AssertionError("fell back")):
+            self._append(data, entries)
+
+        full = self.tmp / "full.yml"
+        catalog_dump(full, data)
+        self.assertEqual(self.path.read_text(encoding="utf-8"), full.read_text(encoding="utf-8"))
+
+    def test_falls_back_when_file_changed(self):
+        data = catalog_load(self.path)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("# edited elsewhere\n")
+        entry = {"id": "APP-QL-CNI-099", "uid": "RQ-09999", "title": "T", "type": "Form Fields", "reqs": []}
+        with mock.patch.object(dsputils, "catalog_dump") as dump:
+            self._append(data, [entry])
+        dump.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()